@@ -1,7 +1,7 @@
 import datetime
 import re
 from abc import ABC
-from typing import Optional, Pattern, TYPE_CHECKING
+from typing import Iterable, Optional, Pattern, TYPE_CHECKING
 
 from log_parser.entity import Player, Team, Weapon
 
@@ -36,8 +36,20 @@ class Event(ABC):
         raise NotImplementedError("This event does not know how to impact a round")
 
     def impact_player_stats(self, player: 'Player', stats: 'PlayerStats', round: 'RoundReport') -> None:
+        """
+        Adds the effect of this event to the stats of the player.
+        RoundReport only calls this for the players returned by get_impacted_players, so a subclass overriding this
+        method must override get_impacted_players too (otherwise it never impacts any stats).
+        """
         pass  # subclass may override this
 
+    def get_impacted_players(self, round: 'RoundReport') -> Iterable['Player']:
+        """
+        Returns every player whose stats may change with this event (see impact_player_stats).
+        RoundReport indexes its events by these players, and ignores this event for everyone else.
+        """
+        return ()  # subclass may override this
+
     def is_attack(self) -> bool:
         return False
 
@@ -120,10 +132,14 @@ class AttackEvent(Event):
     def impact_round(self, round: 'RoundInProgress') -> None:
         round.record_event(self)
 
+    def get_impacted_players(self, round: 'RoundReport') -> Iterable['Player']:
+        return {self._attacker, self._victim}
+
     def impact_player_stats(self, player: 'Player', stats: 'PlayerStats', round: 'RoundReport') -> None:
         if player == self._attacker:
             stats.damage_inflicted += self._damage
-            stats.damage_inflicted_by_weapon[self._weapon] += self._damage
+            damage_by_weapon = stats.damage_inflicted_by_weapon
+            damage_by_weapon[self._weapon] = damage_by_weapon.get(self._weapon, 0) + self._damage
         if player == self._victim:
             stats.damage_received += self._damage
 
@@ -155,6 +171,9 @@ class KillEvent(Event):
     def impact_round(self, round: 'RoundInProgress') -> None:
         round.record_event(self)
 
+    def get_impacted_players(self, round: 'RoundReport') -> Iterable['Player']:
+        return {self._attacker, self._victim}
+
     def impact_player_stats(self, player: 'Player', stats: 'PlayerStats', round: 'RoundReport') -> None:
         if player == self._attacker:
             stats.kills += 1
@@ -216,10 +235,13 @@ class TeamWinEvent(Event):
         round.set_winner_team(self._team)
         round.record_event(self)
 
+    def get_impacted_players(self, round: 'RoundReport') -> Iterable['Player']:
+        return round.get_all_players()
+
     def impact_player_stats(self, player: 'Player', stats: 'PlayerStats', round: 'RoundReport') -> None:
-        if player in round.get_team_composition(self._team):
+        if round.is_part_of_team(player, self._team):
             stats.rounds_won += 1
-        elif player in round.get_all_players():
+        elif round.is_playing(player):
             stats.rounds_lost += 1
 
 
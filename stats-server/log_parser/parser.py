@@ -4,12 +4,12 @@ import pickle
 import re
 from pathlib import Path
 from re import Match
-from typing import Any, Dict, List, Pattern, Union
+from typing import Any, Dict, List, Optional, Pattern, Union
 
 from log_parser.entity import GameEntity
 from log_parser.event import Event
 from log_parser.match import MatchReportFactory
-from log_parser.report import MatchReport, RoundReport
+from log_parser.report import MatchReport, REPORT_FORMAT_VERSION, RoundReport
 
 
 class UnhandledLine(Exception):
@@ -93,10 +93,12 @@ class LogDirectoryParser:
         return reports
 
     def load_or_parse(self, log_path):
-        match_report_path = self._reports_paths / log_path.name.replace('.log', '.pickle')
+        # the format version is part of the name, so reports pickled by other versions are never loaded
+        match_report_path = self._reports_paths / log_path.name.replace('.log', f'.v{REPORT_FORMAT_VERSION}.pickle')
+        report = None
         if match_report_path.exists():
             report = self.load_from_file(match_report_path)
-        else:
+        if report is None:
             report = self.parse_from_log(log_path)
             self.save_to_file(match_report_path, report)
         return report
@@ -111,10 +113,18 @@ class LogDirectoryParser:
         report = parser.get_match_report()
         return report
 
-    def load_from_file(self, match_report_path):
+    def load_from_file(self, match_report_path) -> Optional[MatchReport]:
         logging.debug(f"Loading report from {match_report_path}")
-        with open(match_report_path, 'rb') as match_report_file:
-            match_report = pickle.load(match_report_file)
+        try:
+            with open(match_report_path, 'rb') as match_report_file:
+                match_report = pickle.load(match_report_file)
+        except Exception:
+            # a broken or outdated pickle is just a cache miss, the log file will be parsed again
+            logging.warning(f"Could not load report from {match_report_path}", exc_info=True)
+            return None
+        if not isinstance(match_report, MatchReport):
+            logging.warning(f"Ignoring unexpected object in {match_report_path}")
+            return None
         return match_report
 
 
@@ -1,27 +1,61 @@
 import collections
 import datetime
+import heapq
+import itertools
 import logging
-import typing
-from dataclasses import dataclass, field
-from functools import lru_cache
-from typing import Collection, Dict, Iterable, Iterator, List, Mapping, Optional, TYPE_CHECKING, Tuple
-
-from frozendict import frozendict
+from dataclasses import dataclass
+from operator import itemgetter, methodcaller
+from typing import Collection, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 from log_parser.entity import CT_team, Player, Team, Terrorist_team, Weapon
 from log_parser.event import Event, KillEvent
 
+# Reports are pickled to avoid parsing logs again (see LogDirectoryParser).
+# Bump this whenever the attributes of the report classes change, so previously pickled reports are parsed again.
+REPORT_FORMAT_VERSION = 2
+
 
-@dataclass
+@dataclass(init=False)  # slots can't have class level defaults, so we write our own __init__
 class PlayerStats:
-    damage_inflicted: int = 0
-    damage_received: int = 0
-    kills: int = 0
-    deaths: int = 0
-    rounds_won: int = 0
-    rounds_lost: int = 0
-    time_spent: datetime.timedelta = datetime.timedelta(0)
-    damage_inflicted_by_weapon: Dict['Weapon', int] = field(default_factory=lambda: collections.defaultdict(int))
+    __slots__ = (
+        'damage_inflicted',
+        'damage_received',
+        'kills',
+        'deaths',
+        'rounds_won',
+        'rounds_lost',
+        'time_spent',
+        'damage_inflicted_by_weapon',
+    )
+
+    damage_inflicted: int
+    damage_received: int
+    kills: int
+    deaths: int
+    rounds_won: int
+    rounds_lost: int
+    time_spent: datetime.timedelta
+    damage_inflicted_by_weapon: Dict['Weapon', int]
+
+    def __init__(
+        self,
+        damage_inflicted: int = 0,
+        damage_received: int = 0,
+        kills: int = 0,
+        deaths: int = 0,
+        rounds_won: int = 0,
+        rounds_lost: int = 0,
+        time_spent: datetime.timedelta = datetime.timedelta(0),
+        damage_inflicted_by_weapon: Optional[Dict['Weapon', int]] = None,
+    ) -> None:
+        self.damage_inflicted = damage_inflicted
+        self.damage_received = damage_received
+        self.kills = kills
+        self.deaths = deaths
+        self.rounds_won = rounds_won
+        self.rounds_lost = rounds_lost
+        self.time_spent = time_spent
+        self.damage_inflicted_by_weapon = {} if damage_inflicted_by_weapon is None else damage_inflicted_by_weapon
 
     def time_spent_in_seconds(self) -> float:
         return self.time_spent.total_seconds()
@@ -38,18 +72,32 @@ class RoundReport:
         self,
         start_time: datetime.datetime,
         end_time: datetime.datetime,
-        events: List[Event],
-        team_composition: Dict[Team, List[Player]],
+        events: Sequence[Event],
+        team_composition: Mapping[Team, Sequence[Player]],
         winner_team: Optional[Team],
     ):
         self._start_time = start_time
         self._end_time = end_time
-        # copy and freeze the mutable objects
+        self._round_duration = end_time - start_time
+        # copy and freeze the mutable objects (tuple() returns tuples as they are, so those are not copied)
         self._events: Tuple[Event, ...] = tuple(events)
-        self._team_composition: Mapping[Team, Tuple[Player, ...]] = frozendict(
-            {team: tuple(players) for team, players in team_composition.items()}
-        )
+        self._ct_players: Tuple[Player, ...] = tuple(team_composition[CT_team])
+        self._terrorist_players: Tuple[Player, ...] = tuple(team_composition[Terrorist_team])
         self._winner_team = winner_team
+        # ignore spectators
+        self._all_players_tuple: Tuple[Player, ...] = self._ct_players + self._terrorist_players
+        self._all_players_set: FrozenSet[Player] = frozenset(self._all_players_tuple)
+        self._ct_players_set: FrozenSet[Player] = frozenset(self._ct_players)
+        self._terrorist_players_set: FrozenSet[Player] = frozenset(self._terrorist_players)
+        # index the events by impacted player, so the stats of a player only visit the events involving them
+        events_by_player: Dict[Player, List[Event]] = collections.defaultdict(list)
+        for event in self._events:
+            for player in event.get_impacted_players(self):
+                if player in self._all_players_set:
+                    events_by_player[player].append(event)
+        self._events_by_player: Dict[Player, Tuple[Event, ...]] = {
+            player: tuple(player_events) for player, player_events in events_by_player.items()
+        }
 
     def get_start_time(self) -> datetime.datetime:
         return self._start_time
@@ -58,40 +106,66 @@ class RoundReport:
         return self._end_time
 
     def get_round_duration(self) -> datetime.timedelta:
-        return self._end_time - self._start_time
+        return self._round_duration
 
     def get_events(self) -> Tuple[Event, ...]:
         return self._events
 
     def get_team_composition(self, team: Team) -> Tuple[Player, ...]:
-        return self._team_composition[team]
+        if team == CT_team:
+            return self._ct_players
+        if team == Terrorist_team:
+            return self._terrorist_players
+        raise KeyError(team)  # spectators are not part of any round
 
     def get_ct_team_composition(self) -> Tuple[Player, ...]:
-        return self.get_team_composition(CT_team)
+        return self._ct_players
 
     def get_terrorist_team_composition(self) -> Tuple[Player, ...]:
-        return self.get_team_composition(Terrorist_team)
+        return self._terrorist_players
+
+    def is_playing(self, player: Player) -> bool:
+        return player in self._all_players_set
+
+    def is_part_of_team(self, player: Player, team: Team) -> bool:
+        if team == CT_team:
+            return player in self._ct_players_set
+        if team == Terrorist_team:
+            return player in self._terrorist_players_set
+        return False
 
     def get_winner_team(self) -> Optional[Team]:
         return self._winner_team
 
     def get_all_players(self) -> Tuple[Player, ...]:
-        # ignore spectators
-        return self.get_ct_team_composition() + self.get_terrorist_team_composition()
+        return self._all_players_tuple
 
     def get_player_stats(self, player: Player) -> 'PlayerStats':
-        assert player in self.get_all_players()
+        assert player in self._all_players_set
         stats = PlayerStats()
         self.add_to_player_stats(player, stats)
         return stats
 
     def add_to_player_stats(self, player: Player, stats: PlayerStats) -> None:
-        if player in self.get_all_players():
-            for event in self.get_events():
+        if player in self._all_players_set:
+            for event in self._events_by_player.get(player, ()):
                 event.impact_player_stats(player, stats, self)
             # ignore middle-round disconnections
-            duration = self.get_round_duration()
-            stats.time_spent += duration
+            stats.time_spent += self._round_duration
+
+    def accumulate_all_stats(self, table: Dict[Player, PlayerStats]) -> None:
+        """
+        Adds the stats of every player in this round to the table, visiting each event once per impacted player.
+        The table must create its missing entries (e.g. a defaultdict of PlayerStats).
+        """
+        for player, player_events in self._events_by_player.items():
+            stats = table[player]
+            for event in player_events:
+                event.impact_player_stats(player, stats, self)
+        # ignore middle-round disconnections
+        duration = self._round_duration
+        for player in self._all_players_tuple:
+            table[player].time_spent += duration
 
 
 class MatchReport:
@@ -105,18 +179,27 @@ class MatchReport:
         self._match_events = match_events
         self._map_name = map_name
         self._round_reports = tuple(rounds)  # make inmutable
+        self._all_players: FrozenSet[Player] = frozenset().union(
+            *(round.get_all_players() for round in self._round_reports)
+        )
+        # lazily calculated, see get_rounds_by_winner_team, get_scores and _all_round_events
+        self._rounds_by_winner_team: Optional[Dict[Team, Tuple[RoundReport, ...]]] = None
+        self._scores: Optional[Dict[Team, int]] = None
+        self._round_events: Optional[Tuple[Event, ...]] = None
 
     def get_round_reports(self) -> Tuple[RoundReport, ...]:
         return self._round_reports
 
     def get_first_attack(self) -> Event:
-        for event in self._all_round_events():
-            if event.is_attack():
-                return event
-        raise Exception("There's no blood in this game")
+        first_attack = next(filter(methodcaller('is_attack'), self._all_round_events()), None)
+        if first_attack is None:
+            raise Exception("There's no blood in this game")
+        return first_attack
 
     def get_first_kill(self) -> KillEvent:
-        return next(iter(self.get_all_kills()))
+        first_kill = next(filter(methodcaller('is_kill'), self._all_round_events()))
+        assert isinstance(first_kill, KillEvent)
+        return first_kill
 
     def get_all_kills(self) -> Iterable[KillEvent]:
         for event in self._all_round_events():
@@ -138,21 +221,29 @@ class MatchReport:
         return end_time
 
     def get_rounds_by_winner_team(self) -> Dict[Team, List[RoundReport]]:
-        rounds_by_winner_team: Dict[Team, List[RoundReport]] = {
-            CT_team: [],
-            Terrorist_team: [],
-        }
-        for round_report in self.get_round_reports():
-            winner_team = round_report.get_winner_team()
-            if winner_team:
-                rounds_by_winner_team[winner_team].append(round_report)
-        return rounds_by_winner_team
+        if self._rounds_by_winner_team is None:
+            rounds_by_winner_team: Dict[Team, List[RoundReport]] = {
+                CT_team: [],
+                Terrorist_team: [],
+            }
+            for round_report in self.get_round_reports():
+                winner_team = round_report.get_winner_team()
+                if winner_team:
+                    rounds_by_winner_team[winner_team].append(round_report)
+            self._rounds_by_winner_team = {team: tuple(rounds) for team, rounds in rounds_by_winner_team.items()}
+        # copy, so callers can't change the cached value
+        return {team: list(rounds) for team, rounds in self._rounds_by_winner_team.items()}
 
     def get_scores(self) -> Dict[Team, int]:
-        return {team: len(rounds_won) for team, rounds_won in self.get_rounds_by_winner_team().items()}
+        return dict(self._get_cached_scores())  # copy, so callers can't change the cached value
 
     def get_team_score(self, team: Team) -> int:
-        return self.get_scores()[team]
+        return self._get_cached_scores()[team]
+
+    def _get_cached_scores(self) -> Mapping[Team, int]:
+        if self._scores is None:
+            self._scores = {team: len(rounds_won) for team, rounds_won in self.get_rounds_by_winner_team().items()}
+        return self._scores
 
     def get_player_stats(self, player: Player) -> PlayerStats:
         stats = PlayerStats()
@@ -160,33 +251,36 @@ class MatchReport:
         return stats
 
     def get_all_player_stats(self) -> Dict[Player, PlayerStats]:
-        return {player: self.get_player_stats(player) for player in self.get_all_players()}
+        table: Dict[Player, PlayerStats] = collections.defaultdict(PlayerStats)
+        self.add_to_player_stats_table(table)
+        return dict(table)
 
     def add_to_player_stats(self, player: Player, stats: PlayerStats) -> None:
         for round in self.get_round_reports():
             round.add_to_player_stats(player, stats)
 
     def add_to_player_stats_table(self, table: Dict[Player, PlayerStats]) -> None:
+        # the table must create its missing entries, see RoundReport.accumulate_all_stats.
+        # register the players first, so the table order (used to break ties in scores) does not depend on events
         for player in self.get_all_players():
-            stats = table[player]
-            self.add_to_player_stats(player, stats)
+            table[player]
+        for round in self.get_round_reports():
+            round.accumulate_all_stats(table)
 
-    def get_all_players(self) -> Iterable[Player]:
-        return {player for round in self.get_round_reports() for player in round.get_all_players()}
+    def get_all_players(self) -> FrozenSet[Player]:
+        return self._all_players
 
-    def _all_round_events(self) -> Iterator[Event]:
-        return (event for round in self.get_round_reports() for event in round.get_events())
+    def _all_round_events(self) -> Tuple[Event, ...]:
+        if self._round_events is None:
+            round_events = (round.get_events() for round in self.get_round_reports())
+            self._round_events = tuple(itertools.chain.from_iterable(round_events))
+        return self._round_events
 
 
 PlayerTable = Dict[Player, PlayerStats]
 
-if TYPE_CHECKING:
-    BaseClass = typing.Iterable[MatchReport]
-else:
-    BaseClass = collections.Iterable
-
 
-class MatchReportCollection(BaseClass):
+class MatchReportCollection(Iterable[MatchReport]):
     """
     A collection of ended matches.
     Useful to cache some stats.
@@ -194,26 +288,33 @@ class MatchReportCollection(BaseClass):
 
     def __init__(self, match_reports: Collection[MatchReport]) -> None:
         self._match_reports = match_reports
+        self._stats_cache: Optional[PlayerTable] = None
 
-    @lru_cache(maxsize=None)
     def collect_stats(self) -> PlayerTable:
-        stats_by_player: PlayerTable = collections.defaultdict(PlayerStats)
-        for report in self._match_reports:
-            report.add_to_player_stats_table(stats_by_player)
-            logging.debug(f"Stats collected for match {report}")
-        return stats_by_player
+        if self._stats_cache is None:
+            stats_by_player: PlayerTable = collections.defaultdict(PlayerStats)
+            for report in self._match_reports:
+                report.add_to_player_stats_table(stats_by_player)
+                logging.debug(f"Stats collected for match {report}")
+            self._stats_cache = stats_by_player
+        return self._stats_cache
 
     def get_total_number_of_rounds(self):
         return sum(len(match.get_round_reports()) for match in self._match_reports)
 
     def get_sorted_score_table(self, scorer: 'ScorerStrategy') -> List[Tuple[Player, float]]:
         scores = scorer.get_player_scores(self)
-        sorted_score_table = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        sorted_score_table = sorted(scores.items(), key=itemgetter(1), reverse=True)
         return sorted_score_table
 
     def get_best_player(self, scorer: 'ScorerStrategy') -> Tuple[Player, float]:
-        score_table = self.get_sorted_score_table(scorer)
-        return score_table[0]
+        scores = scorer.get_player_scores(self)
+        return max(scores.items(), key=itemgetter(1))
+
+    def get_top_k(self, scorer: 'ScorerStrategy', k: int) -> List[Tuple[Player, float]]:
+        # same as the first k rows of get_sorted_score_table, without sorting the whole table
+        scores = scorer.get_player_scores(self)
+        return heapq.nlargest(k, scores.items(), key=itemgetter(1))
 
     def get_full_player_scores(self, scorer: 'ScorerStrategy') -> Mapping[Player, 'FullScore']:
         return scorer.get_full_player_scores(self)
@@ -2,6 +2,7 @@ import datetime
 import logging
 from abc import ABC
 from collections import defaultdict
+from operator import itemgetter
 from typing import Collection, Dict, List, Mapping, NamedTuple, Optional, Tuple
 
 from log_parser.entity import Player
@@ -75,11 +76,8 @@ class DefaultScorer(ScorerStrategy):
     stat_explanation = "kills - deaths"
 
     def get_player_scores(self, match_reports: MatchReportCollection) -> Mapping[Player, float]:
-        scores: Dict[Player, int] = defaultdict(int)
         stats_by_player: PlayerTable = match_reports.collect_stats()
-        for player, stats in stats_by_player.items():
-            scores[player] += stats.kills
-            scores[player] -= stats.deaths
+        scores = {player: stats.kills - stats.deaths for player, stats in stats_by_player.items()}
         return scores
 
     def get_confidence_in_player_scores(self, match_reports: MatchReportCollection) -> Mapping[Player, float]:
@@ -200,8 +198,9 @@ class GlickoScorer(ScorerStrategy):
                 victim_ranking = rankings[victim]
                 logging.debug(f"Updating ranking of {attacker}[{attacker_ranking}] vs {victim}[{victim_ranking}]")
                 attacker_ranking.register_win(victim_ranking)
+            match_players = match.get_all_players()
             for player in rankings.keys():
-                if player not in match.get_all_players():
+                if player not in match_players:
                     rankings[player].did_not_compete()  # updates variance
         return rankings
 
@@ -241,9 +240,9 @@ class MatchStatsExtractor:
 
     def get_sorted_score_table(self) -> List[Tuple[Player, float]]:
         scores = self._scorer.get_player_scores(self._match_reports)
-        sorted_score_table = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        sorted_score_table = sorted(scores.items(), key=itemgetter(1), reverse=True)
         return sorted_score_table
 
     def get_best_player(self) -> Tuple[Player, float]:
-        score_table = self.get_sorted_score_table()
-        return score_table[0]
+        scores = self._scorer.get_player_scores(self._match_reports)
+        return max(scores.items(), key=itemgetter(1))
@@ -1,9 +1,14 @@
 import datetime
 import logging
+import pickle
+import shutil
+import tempfile
 import unittest
+from pathlib import Path
 
 from log_parser.entity import CT_team, Player, Terrorist_team, Weapon
 from log_parser.parser import LogDirectoryParser, LogParser
+from log_parser.report import PlayerStats, REPORT_FORMAT_VERSION
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -145,6 +150,19 @@ class LogParserTests(unittest.TestCase):
         assert match_report.get_team_score(CT_team) == 28
         assert match_report.get_team_score(Terrorist_team) == 5
 
+    def test_changing_the_returned_scores_does_not_change_the_match_score(self):
+        # given a match report
+        filename = "tests/logs/L0409001.log"
+        parser = LogParser.from_filename(filename)
+        match_report = parser.get_match_report()
+        # when the returned scores and rounds are changed
+        match_report.get_scores()[CT_team] = 0
+        match_report.get_rounds_by_winner_team()[CT_team].clear()
+        # then the match report still knows the final match score
+        assert match_report.get_team_score(CT_team) == 28
+        assert match_report.get_scores()[CT_team] == 28
+        assert len(match_report.get_rounds_by_winner_team()[CT_team]) == 28
+
     def test_can_know_a_player_round_stats(self) -> None:
         # given a log where a player inflicted damage and killed an opponent
         logtext = """
@@ -186,6 +204,58 @@ class LogParserTests(unittest.TestCase):
         assert player_stats.kills == 36
         assert player_stats.deaths == 10
 
+    def test_round_stats_match_a_replay_of_every_round_event(self):
+        # given a log file
+        filename = "tests/logs/L0409001.log"
+        # when feeded to the log parser
+        parser = LogParser.from_filename(filename)
+        match_report = parser.get_match_report()
+        # then the stats of every player in every round match replaying all the round events for that player
+        for round_report in match_report.get_round_reports():
+            for player in round_report.get_all_players():
+                replayed_stats = PlayerStats()
+                for event in round_report.get_events():
+                    event.impact_player_stats(player, replayed_stats, round_report)
+                replayed_stats.time_spent += round_report.get_round_duration()
+                assert round_report.get_player_stats(player) == replayed_stats
+
+    def test_can_know_all_players_match_stats(self):
+        # given a log file
+        filename = "tests/logs/L0409001.log"
+        # when feeded to the log parser
+        parser = LogParser.from_filename(filename)
+        match_report = parser.get_match_report()
+        # then the match stats of every player match the stats of each single player
+        all_player_stats = match_report.get_all_player_stats()
+        assert set(all_player_stats) == set(match_report.get_all_players())
+        for player, player_stats in all_player_stats.items():
+            assert player_stats == match_report.get_player_stats(player)
+
+    def test_reports_pickled_by_other_versions_are_parsed_again(self):
+        # given a logs directory with a report pickled by a previous version
+        with tempfile.TemporaryDirectory() as logs_path:
+            shutil.copy("tests/logs/L0409001.log", logs_path)
+            reports_path = Path(logs_path) / "reports"
+            reports_path.mkdir()
+            (reports_path / "L0409001.pickle").write_bytes(pickle.dumps("an outdated report"))
+            # when the log parser reads the directory
+            match_reports = LogDirectoryParser(logs_path).get_all_match_reports()
+            # then the log file is parsed again
+            assert match_reports[0].get_team_score(CT_team) == 28
+
+    def test_broken_pickled_reports_are_parsed_again(self):
+        # given a logs directory with a broken pickled report
+        with tempfile.TemporaryDirectory() as logs_path:
+            shutil.copy("tests/logs/L0409001.log", logs_path)
+            parser = LogDirectoryParser(logs_path)
+            match_report_path = Path(logs_path) / "reports" / f"L0409001.v{REPORT_FORMAT_VERSION}.pickle"
+            match_report_path.write_bytes(b"not a pickle")
+            # when the log parser reads the directory
+            match_reports = parser.get_all_match_reports()
+            # then the log file is parsed again, and the report is pickled again
+            assert match_reports[0].get_team_score(CT_team) == 28
+            assert parser.load_from_file(match_report_path) is not None
+
     @unittest.skip
     def test_can_read_the_logs_from_an_entire_directory(self):
         # given a directory with many logs
@@ -35,6 +35,18 @@ class ScorerTestCase(unittest.TestCase):
         best_player = score_table[0][0]
         assert best_player == player
 
+    def test_can_get_the_top_players_from_many_matches(self):
+        # given a list of matches
+        logs = "tests/logs"
+        match_reports = LogDirectoryParser(logs).get_all_match_reports()
+        # when given to the stats extractor
+        scorer = DefaultScorer()
+        stats = MatchReportCollection(match_reports)
+        # we can know the top players without the full score table
+        top_players = stats.get_top_k(scorer, 3)
+        print(top_players)
+        assert top_players == stats.get_sorted_score_table(scorer)[:3]
+
     def test_can_filter_players_with_less_than_n_rounds(self):
         # given a list of matches
         logs = "tests/logs"